@@ -1,6 +1,10 @@
 """The OCR Water Heater integration."""
 from __future__ import annotations
 
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import Platform
@@ -8,12 +12,7 @@ from homeassistant.const import Platform
 from .const import (
     CONF_IMAGE_URL, CONF_UPDATE_INTERVAL, CONF_DEBUG_MODE, CONF_SKEW, CONF_GAMMA,
     DEFAULT_UPDATE_INTERVAL, DEFAULT_DEBUG_MODE, DEFAULT_SKEW, DEFAULT_GAMMA,
-    CONF_OCR_X, CONF_OCR_Y, CONF_OCR_W, CONF_OCR_H, DEFAULT_ROI_OCR,
-    CONF_PANEL_X, CONF_PANEL_Y, CONF_PANEL_W, CONF_PANEL_H, DEFAULT_ROI_PANEL,
-    CONF_SET_X, CONF_SET_Y, CONF_SET_W, CONF_SET_H, DEFAULT_ROI_SETTING,
-    CONF_LOW_X, CONF_LOW_Y, CONF_LOW_W, CONF_LOW_H, DEFAULT_ROI_LOW,
-    CONF_HALF_X, CONF_HALF_Y, CONF_HALF_W, CONF_HALF_H, DEFAULT_ROI_HALF,
-    CONF_FULL_X, CONF_FULL_Y, CONF_FULL_W, CONF_FULL_H, DEFAULT_ROI_FULL
+    ROI_SPECS, MODE_ROI_NAMES
 )
 
 from .controller import WaterHeaterController
@@ -24,41 +23,69 @@ from .water_heater import OCRCoordinator
 
 PLATFORMS: list[Platform] = [Platform.WATER_HEATER]
 
+ROI = tuple[int, int, int, int]
+
+
+def _roi(config: Mapping[str, Any], name: str) -> ROI:
+    """按配置表读取 (x, y, w, h)，缺失项使用默认值"""
+    keys, defaults = ROI_SPECS[name]
+    return tuple(config.get(k, d) for k, d in zip(keys, defaults))
+
+
+@dataclass(frozen=True, slots=True)
+class OCRConfig:
+    """解析后的条目配置 (默认值只在 setup 时解析一次)."""
+
+    image_url: str | None
+    update_interval: int
+    debug_mode: bool
+    skew: float
+    gamma: float
+    ocr_roi: ROI
+    panel_roi: ROI
+    # (名称, ROI) 对；用元组而不是 dict，保证实例不可变且可哈希
+    mode_rois: tuple[tuple[str, ROI], ...]
+
+    @classmethod
+    def from_mapping(cls, config: Mapping[str, Any]) -> OCRConfig:
+        return cls(
+            image_url=config.get(CONF_IMAGE_URL),
+            update_interval=config.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL),
+            debug_mode=config.get(CONF_DEBUG_MODE, DEFAULT_DEBUG_MODE),
+            skew=config.get(CONF_SKEW, DEFAULT_SKEW),
+            gamma=config.get(CONF_GAMMA, DEFAULT_GAMMA),
+            ocr_roi=_roi(config, "ocr"),
+            panel_roi=_roi(config, "panel"),
+            mode_rois=tuple((name, _roi(config, name)) for name in MODE_ROI_NAMES),
+        )
+
+
 # 工厂函数 (原本在 water_heater.py 里的)
-def _create_processors(config):
+def _create_processors(cfg: OCRConfig):
     from .ocr_processor import OCRProcessor
     from .mode_processor import ModeProcessor
-    ocr_roi = (config.get(CONF_OCR_X, DEFAULT_ROI_OCR[0]), config.get(CONF_OCR_Y, DEFAULT_ROI_OCR[1]), config.get(CONF_OCR_W, DEFAULT_ROI_OCR[2]), config.get(CONF_OCR_H, DEFAULT_ROI_OCR[3]))
-    panel_roi = (config.get(CONF_PANEL_X, DEFAULT_ROI_PANEL[0]), config.get(CONF_PANEL_Y, DEFAULT_ROI_PANEL[1]), config.get(CONF_PANEL_W, DEFAULT_ROI_PANEL[2]), config.get(CONF_PANEL_H, DEFAULT_ROI_PANEL[3]))
-    skew = config.get(CONF_SKEW, DEFAULT_SKEW)
-    gamma = config.get(CONF_GAMMA, DEFAULT_GAMMA)
     ocr_p = OCRProcessor()
-    ocr_p.configure(roi=ocr_roi, skew=skew)
-    mode_rois = {
-        "setting": (config.get(CONF_SET_X, DEFAULT_ROI_SETTING[0]), config.get(CONF_SET_Y, DEFAULT_ROI_SETTING[1]), config.get(CONF_SET_W, DEFAULT_ROI_SETTING[2]), config.get(CONF_SET_H, DEFAULT_ROI_SETTING[3])),
-        "low":     (config.get(CONF_LOW_X, DEFAULT_ROI_LOW[0]), config.get(CONF_LOW_Y, DEFAULT_ROI_LOW[1]), config.get(CONF_LOW_W, DEFAULT_ROI_LOW[2]), config.get(CONF_LOW_H, DEFAULT_ROI_LOW[3])),
-        "half":    (config.get(CONF_HALF_X, DEFAULT_ROI_HALF[0]), config.get(CONF_HALF_Y, DEFAULT_ROI_HALF[1]), config.get(CONF_HALF_W, DEFAULT_ROI_HALF[2]), config.get(CONF_HALF_H, DEFAULT_ROI_HALF[3])),
-        "full":    (config.get(CONF_FULL_X, DEFAULT_ROI_FULL[0]), config.get(CONF_FULL_Y, DEFAULT_ROI_FULL[1]), config.get(CONF_FULL_W, DEFAULT_ROI_FULL[2]), config.get(CONF_FULL_H, DEFAULT_ROI_FULL[3]))
-    }
+    ocr_p.configure(roi=cfg.ocr_roi, skew=cfg.skew, debug_mode=cfg.debug_mode)
     mode_p = ModeProcessor()
-    mode_p.configure(panel_roi=panel_roi, sub_rois=mode_rois, ocr_roi=ocr_roi, gamma=gamma)
+    mode_p.configure(
+        panel_roi=cfg.panel_roi, sub_rois=dict(cfg.mode_rois), ocr_roi=cfg.ocr_roi,
+        gamma=cfg.gamma, debug_mode=cfg.debug_mode
+    )
     return ocr_p, mode_p
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up OCR Water Heater from a config entry."""
     config = {**entry.data, **entry.options}
-    url = config.get(CONF_IMAGE_URL)
-    interval = config.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
-    debug = config.get(CONF_DEBUG_MODE, DEFAULT_DEBUG_MODE)
+    cfg = OCRConfig.from_mapping(config)
 
     # 1. 创建处理器
-    ocr_p, mode_p = await hass.async_add_executor_job(_create_processors, config)
+    ocr_p, mode_p = await hass.async_add_executor_job(_create_processors, cfg)
     
     # 2. 创建控制器
     controller = WaterHeaterController(hass, config)
 
     # 3. 创建 Coordinator
-    coordinator = OCRCoordinator(hass, ocr_p, mode_p, controller, url, interval, debug)
+    coordinator = OCRCoordinator(hass, ocr_p, mode_p, controller, cfg.image_url, cfg.update_interval, cfg.debug_mode)
     
     # 4. 首次刷新
     await coordinator.async_config_entry_first_refresh()
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import logging
 from typing import Any
+import aiohttp
 import voluptuous as vol
 
 from homeassistant.config_entries import (
@@ -19,58 +20,39 @@ from .const import (
     CONF_IMAGE_URL, CONF_UPDATE_INTERVAL, CONF_DEBUG_MODE, CONF_SKEW,
     CONF_MIIO_IP, CONF_MIIO_TOKEN,
     DEFAULT_UPDATE_INTERVAL, DEFAULT_DEBUG_MODE, DEFAULT_SKEW,
-    CONF_OCR_X, CONF_OCR_Y, CONF_OCR_W, CONF_OCR_H, DEFAULT_ROI_OCR,
-    CONF_SET_X, CONF_SET_Y, CONF_SET_W, CONF_SET_H, DEFAULT_ROI_SETTING,
-    CONF_LOW_X, CONF_LOW_Y, CONF_LOW_W, CONF_LOW_H, DEFAULT_ROI_LOW,
-    CONF_HALF_X, CONF_HALF_Y, CONF_HALF_W, CONF_HALF_H, DEFAULT_ROI_HALF,
-    CONF_FULL_X, CONF_FULL_Y, CONF_FULL_W, CONF_FULL_H, DEFAULT_ROI_FULL,
+    ROI_SPECS, MODE_ROI_NAMES,
+    FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT, FETCH_TOTAL_TIMEOUT,
     DEFAULT_NAME
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 def get_schema(defaults: dict[str, Any]) -> vol.Schema:
-    return vol.Schema(
-        {
-            vol.Required(CONF_IMAGE_URL, default=defaults.get(CONF_IMAGE_URL, "http://")): str,
-            vol.Optional(CONF_MIIO_IP, default=defaults.get(CONF_MIIO_IP, "")): str,
-            vol.Optional(CONF_MIIO_TOKEN, default=defaults.get(CONF_MIIO_TOKEN, "")): str,
-            vol.Optional(CONF_UPDATE_INTERVAL, default=defaults.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=100)),
-            vol.Optional(CONF_SKEW, default=defaults.get(CONF_SKEW, DEFAULT_SKEW)): vol.Coerce(float),
-            vol.Optional(CONF_DEBUG_MODE, default=defaults.get(CONF_DEBUG_MODE, DEFAULT_DEBUG_MODE)): bool,
-
-            vol.Optional(CONF_OCR_X, default=defaults.get(CONF_OCR_X, DEFAULT_ROI_OCR[0])): int,
-            vol.Optional(CONF_OCR_Y, default=defaults.get(CONF_OCR_Y, DEFAULT_ROI_OCR[1])): int,
-            vol.Optional(CONF_OCR_W, default=defaults.get(CONF_OCR_W, DEFAULT_ROI_OCR[2])): int,
-            vol.Optional(CONF_OCR_H, default=defaults.get(CONF_OCR_H, DEFAULT_ROI_OCR[3])): int,
-
-            vol.Optional(CONF_SET_X, default=defaults.get(CONF_SET_X, DEFAULT_ROI_SETTING[0])): int,
-            vol.Optional(CONF_SET_Y, default=defaults.get(CONF_SET_Y, DEFAULT_ROI_SETTING[1])): int,
-            vol.Optional(CONF_SET_W, default=defaults.get(CONF_SET_W, DEFAULT_ROI_SETTING[2])): int,
-            vol.Optional(CONF_SET_H, default=defaults.get(CONF_SET_H, DEFAULT_ROI_SETTING[3])): int,
-
-            vol.Optional(CONF_LOW_X, default=defaults.get(CONF_LOW_X, DEFAULT_ROI_LOW[0])): int,
-            vol.Optional(CONF_LOW_Y, default=defaults.get(CONF_LOW_Y, DEFAULT_ROI_LOW[1])): int,
-            vol.Optional(CONF_LOW_W, default=defaults.get(CONF_LOW_W, DEFAULT_ROI_LOW[2])): int,
-            vol.Optional(CONF_LOW_H, default=defaults.get(CONF_LOW_H, DEFAULT_ROI_LOW[3])): int,
-
-            vol.Optional(CONF_HALF_X, default=defaults.get(CONF_HALF_X, DEFAULT_ROI_HALF[0])): int,
-            vol.Optional(CONF_HALF_Y, default=defaults.get(CONF_HALF_Y, DEFAULT_ROI_HALF[1])): int,
-            vol.Optional(CONF_HALF_W, default=defaults.get(CONF_HALF_W, DEFAULT_ROI_HALF[2])): int,
-            vol.Optional(CONF_HALF_H, default=defaults.get(CONF_HALF_H, DEFAULT_ROI_HALF[3])): int,
-
-            vol.Optional(CONF_FULL_X, default=defaults.get(CONF_FULL_X, DEFAULT_ROI_FULL[0])): int,
-            vol.Optional(CONF_FULL_Y, default=defaults.get(CONF_FULL_Y, DEFAULT_ROI_FULL[1])): int,
-            vol.Optional(CONF_FULL_W, default=defaults.get(CONF_FULL_W, DEFAULT_ROI_FULL[2])): int,
-            vol.Optional(CONF_FULL_H, default=defaults.get(CONF_FULL_H, DEFAULT_ROI_FULL[3])): int,
-        }
-    )
+    schema = {
+        vol.Required(CONF_IMAGE_URL, default=defaults.get(CONF_IMAGE_URL, "http://")): str,
+        vol.Optional(CONF_MIIO_IP, default=defaults.get(CONF_MIIO_IP, "")): str,
+        vol.Optional(CONF_MIIO_TOKEN, default=defaults.get(CONF_MIIO_TOKEN, "")): str,
+        vol.Optional(CONF_UPDATE_INTERVAL, default=defaults.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=100)),
+        vol.Optional(CONF_SKEW, default=defaults.get(CONF_SKEW, DEFAULT_SKEW)): vol.Coerce(float),
+        vol.Optional(CONF_DEBUG_MODE, default=defaults.get(CONF_DEBUG_MODE, DEFAULT_DEBUG_MODE)): bool,
+    }
+
+    # ROI 坐标 (x, y, w, h) 按配置表逐项生成
+    for name in ("ocr", *MODE_ROI_NAMES):
+        keys, roi_defaults = ROI_SPECS[name]
+        for key, default in zip(keys, roi_defaults):
+            schema[vol.Optional(key, default=defaults.get(key, default))] = int
+
+    return vol.Schema(schema)
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
     session = aiohttp_client.async_get_clientsession(hass)
+    timeout = aiohttp.ClientTimeout(
+        total=FETCH_TOTAL_TIMEOUT, connect=FETCH_CONNECT_TIMEOUT, sock_read=FETCH_READ_TIMEOUT
+    )
     try:
-        async with session.get(data[CONF_IMAGE_URL], timeout=10) as resp:
+        async with session.get(data[CONF_IMAGE_URL], timeout=timeout) as resp:
             if resp.status != 200:
                 raise ValueError(f"Could not connect, status: {resp.status}")
     except Exception as err:
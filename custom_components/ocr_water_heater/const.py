@@ -30,6 +30,11 @@ DEFAULT_DEBUG_MODE = False
 DEFAULT_GAMMA = 2.0
 DEFAULT_NOISE_LIMIT = 20
 
+# 抓图超时 (秒): 连接 / 读取分开限制，避免卡死的摄像头拖住刷新
+FETCH_CONNECT_TIMEOUT = 1
+FETCH_READ_TIMEOUT = 3
+FETCH_TOTAL_TIMEOUT = 5
+
 # === 配置键名 ===
 CONF_IMAGE_URL = "image_url"
 CONF_UPDATE_INTERVAL = "update_interval"
@@ -46,6 +51,17 @@ CONF_LOW_X, CONF_LOW_Y, CONF_LOW_W, CONF_LOW_H = "low_x", "low_y", "low_w", "low
 CONF_HALF_X, CONF_HALF_Y, CONF_HALF_W, CONF_HALF_H = "half_x", "half_y", "half_w", "half_h"
 CONF_FULL_X, CONF_FULL_Y, CONF_FULL_W, CONF_FULL_H = "full_x", "full_y", "full_w", "full_h"
 
+# ROI 配置表: 名称 -> ((x, y, w, h) 配置键, 默认值)
+ROI_SPECS = {
+    "ocr":     ((CONF_OCR_X, CONF_OCR_Y, CONF_OCR_W, CONF_OCR_H), DEFAULT_ROI_OCR),
+    "panel":   ((CONF_PANEL_X, CONF_PANEL_Y, CONF_PANEL_W, CONF_PANEL_H), DEFAULT_ROI_PANEL),
+    "setting": ((CONF_SET_X, CONF_SET_Y, CONF_SET_W, CONF_SET_H), DEFAULT_ROI_SETTING),
+    "low":     ((CONF_LOW_X, CONF_LOW_Y, CONF_LOW_W, CONF_LOW_H), DEFAULT_ROI_LOW),
+    "half":    ((CONF_HALF_X, CONF_HALF_Y, CONF_HALF_W, CONF_HALF_H), DEFAULT_ROI_HALF),
+    "full":    ((CONF_FULL_X, CONF_FULL_Y, CONF_FULL_W, CONF_FULL_H), DEFAULT_ROI_FULL),
+}
+MODE_ROI_NAMES = ("setting", "low", "half", "full")
+
 # === 算法常量 ===
 RESIZE_FACTOR = 5.0
 SIDE_CROP_PIXELS = 4
@@ -22,6 +22,8 @@ class WaterHeaterController:
         self.token = config.get(CONF_MIIO_TOKEN)
         self._device = None
         self._lock = asyncio.Lock()
+        # 下一条指令最早可发送的时间 (loop.time())，用于保证指令间隔
+        self._next_allowed = 0.0
 
         if self.ip and self.token:
             try:
@@ -32,30 +34,60 @@ class WaterHeaterController:
 
     async def _async_send_raw(self, method: str, params: list):
         """通用发送方法，包含锁、延迟和返回值检查."""
+        async with self._lock:
+            return await self._async_send_locked(method, params)
+
+    async def _async_send_locked(self, method: str, params: list) -> bool:
+        """
+        发送单条指令 (调用方必须持有 self._lock)。
+        只有距离上一条指令不足 COMMAND_DELAY 时才等待，间隔足够时立即发送。
+        """
         if not self._device:
             _LOGGER.error("MIIO 设备未配置，无法发送指令")
             return False
 
-        async with self._lock:
+        loop = asyncio.get_running_loop()
+        wait = self._next_allowed - loop.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        try:
+            _LOGGER.info(f"[控制器] 正在发送指令: {method}...")
             try:
-                _LOGGER.info(f"[控制器] 正在发送指令: {method}...")
                 # 在 executor 中运行阻塞的 miio 操作
                 result = await self.hass.async_add_executor_job(
                     self._device.send, method, params
                 )
+            finally:
+                # 无论成功与否，指令都可能已到达设备，下一条需间隔 COMMAND_DELAY
+                self._next_allowed = loop.time() + COMMAND_DELAY
+            
+            # 检查返回值是否为 ['ok']
+            if result == ['ok']:
+                _LOGGER.info(f"[控制器] 指令发送成功. 返回: {result}")
+                return True
+            else:
+                _LOGGER.error(f"[控制器] 指令已发送但返回异常: {result}")
+                return False
                 
-                # 检查返回值是否为 ['ok']
-                if result == ['ok']:
-                    _LOGGER.info(f"[控制器] 指令发送成功. 返回: {result}")
-                    await asyncio.sleep(COMMAND_DELAY)
-                    return True
-                else:
-                    _LOGGER.error(f"[控制器] 指令已发送但返回异常: {result}")
-                    return False
-                    
-            except (DeviceException, Exception) as e:
-                _LOGGER.error(f"[控制器] 发送异常 ({method}): {e}")
+        except (DeviceException, Exception) as e:
+            _LOGGER.error(f"[控制器] 发送异常 ({method}): {e}")
+            return False
+
+    async def _async_send_repeated_locked(self, method: str, params: list, times: int, label: str) -> bool:
+        """
+        连续发送同一指令 times 次 (调用方必须持有 self._lock)。
+        整组连击只加一次锁，其它指令 (如保活唤醒) 不会插入到连击中间:
+        热水器按“当前菜单状态”解释每次按键，中途插入的唤醒/开关会让菜单超时或切走，
+        剩下的按键就会调到错误的模式/温度。因此其它指令最多等待 times * COMMAND_DELAY，
+        这是有意为之；单条指令之间仍按 _next_allowed 只在必要时等待。
+        """
+        for i in range(times):
+            _LOGGER.info(f"[控制器] {label} 第 {i+1}/{times} 次")
+            if not await self._async_send_locked(method, params):
+                _LOGGER.error(f"[控制器] {label} 第 {i+1} 次失败! 停止发送.")
                 return False
+        return True
 
     async def async_screen_on(self) -> bool:
         """发送屏显/唤醒指令."""
@@ -72,14 +104,8 @@ class WaterHeaterController:
         发送模式切换指令。
         """
         _LOGGER.info(f"[控制器] 动作: 切换模式 (按键 {times} 次)")
-        success = True
-        for i in range(times):
-            _LOGGER.info(f"[控制器] 模式按键第 {i+1}/{times} 次")
-            if not await self._async_send_raw(CMD_METHOD_IR, CMD_VAL_MODE):
-                success = False
-                _LOGGER.error(f"[控制器] 模式按键第 {i+1} 次失败!")
-                break
-        return success
+        async with self._lock:
+            return await self._async_send_repeated_locked(CMD_METHOD_IR, CMD_VAL_MODE, times, "模式按键")
 
     async def async_adjust_temperature(self, steps: int, need_activation: bool = False) -> bool:
         """
@@ -98,24 +124,22 @@ class WaterHeaterController:
 
         count = abs(steps)
         
-        # 日志记录意图
-        if need_activation:
-            _LOGGER.info(f"[控制器] 动作: 调节温度 (步数={steps}). 需要激活 (+1次点击).")
-            # 激活那一击
-            _LOGGER.info("[控制器] >> 发送激活点击 (Activation)...")
-            if not await self._async_send_raw(CMD_METHOD_ELE, cmd_val):
-                _LOGGER.error("[控制器] 激活点击失败!")
-                return False
-        else:
-            _LOGGER.info(f"[控制器] 动作: 调节温度 (步数={steps}). 无需激活.")
-
-        # 发送剩余的步数
-        if count > 0:
-            _LOGGER.info(f"[控制器] >> 发送 {count} 次调节点击...")
-            for i in range(count):
-                _LOGGER.info(f"[控制器] 调节点击 第 {i+1}/{count} 次")
-                if not await self._async_send_raw(CMD_METHOD_ELE, cmd_val):
-                    _LOGGER.error(f"[控制器] 第 {i+1} 次点击失败! 停止发送.")
+        # 激活 + 调节点击作为一组连续发送，期间不释放锁
+        async with self._lock:
+            # 日志记录意图
+            if need_activation:
+                _LOGGER.info(f"[控制器] 动作: 调节温度 (步数={steps}). 需要激活 (+1次点击).")
+                # 激活那一击
+                _LOGGER.info("[控制器] >> 发送激活点击 (Activation)...")
+                if not await self._async_send_locked(CMD_METHOD_ELE, cmd_val):
+                    _LOGGER.error("[控制器] 激活点击失败!")
                     return False
+            else:
+                _LOGGER.info(f"[控制器] 动作: 调节温度 (步数={steps}). 无需激活.")
+
+            # 发送剩余的步数
+            if count > 0:
+                _LOGGER.info(f"[控制器] >> 发送 {count} 次调节点击...")
+                return await self._async_send_repeated_locked(CMD_METHOD_ELE, cmd_val, count, "调节点击")
         
         return True
\ No newline at end of file
@@ -7,6 +7,9 @@ from .const import DEBUG_DIR_ROOT
 
 _LOGGER = logging.getLogger(__name__)
 
+# 调试图 JPEG 质量 (80 足够排查问题，文件约为 95 时的一半)
+DEBUG_JPEG_QUALITY = 80
+
 def save_debug_record(result: str | int | None, images: dict[str, any]):
     """
     保存 OCR 调试记录到文件夹 (使用 PIL)。
@@ -26,9 +29,8 @@ def save_debug_record(result: str | int | None, images: dict[str, any]):
         
         save_dir = os.path.join(DEBUG_DIR_ROOT, folder_name)
 
-        # 2. 创建文件夹
-        if not os.path.exists(save_dir):
-            os.makedirs(save_dir, exist_ok=True)
+        # 2. 创建文件夹 (exist_ok 已处理目录存在的情况)
+        os.makedirs(save_dir, exist_ok=True)
 
         # 3. 遍历字典保存图片
         for filename, img_obj in images.items():
@@ -37,7 +39,7 @@ def save_debug_record(result: str | int | None, images: dict[str, any]):
                 try:
                     # 确保是 PIL Image 对象
                     if isinstance(img_obj, Image.Image):
-                        img_obj.save(file_path, quality=95)
+                        img_obj.save(file_path, quality=DEBUG_JPEG_QUALITY)
                     else:
                         _LOGGER.warning(f"Skipping {filename}: Not a PIL Image object.")
                 except Exception as save_err:
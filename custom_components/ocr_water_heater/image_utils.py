@@ -0,0 +1,115 @@
+"""Shared image helpers for OCR Water Heater (PIL/Numpy Version)."""
+import io
+from functools import lru_cache
+import numpy as np
+from PIL import Image
+
+# 可选加速 (非必需依赖，见 README): 用户自行安装 PyTurboJPEG + libturbojpeg 后，
+# 只解码 ROI 所在的 JPEG 块；未安装时走 PIL 整帧解码
+try:
+    from turbojpeg import TurboJPEG, TJPF_GRAY
+    _TURBO_JPEG = TurboJPEG()
+except Exception:  # 未安装 PyTurboJPEG 或找不到 libturbojpeg
+    _TURBO_JPEG = None
+
+# JPEG 无损裁剪的起点必须对齐 MCU (4:2:0 采样下为 16x16)
+JPEG_MCU_SIZE = 16
+
+_LEVELS = np.arange(256, dtype=np.int64)
+
+
+class GrayFrame:
+    """
+    一次抓图: 原始字节 + 按需解码的整帧 (JPEG 只解亮度通道)。
+    OCR 与模式识别共享同一个实例，整帧最多解码一次。
+    """
+
+    __slots__ = ("data", "_image")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self._image = None
+
+    @classmethod
+    def wrap(cls, frame):
+        """bytes 或 GrayFrame -> GrayFrame"""
+        return frame if isinstance(frame, cls) else cls(frame)
+
+    @property
+    def image(self):
+        """整帧 PIL 图 (首次访问时解码并缓存，解码失败时抛出异常)"""
+        if self._image is None:
+            img = Image.open(io.BytesIO(self.data))
+            # JPEG 只解码亮度通道 (不缩放)，省去色度上采样和颜色转换。
+            # 注意: 解出的是 JPEG 的 Y 通道，与 convert("L") 的 RGB->L 结果不完全相同
+            # (彩色边缘处可差几个灰度级)，Otsu 阈值可能随之偏移 1~2 级
+            img.draft("L", img.size)
+            img.load()
+            self._image = img
+        return self._image
+
+
+def mcu_aligned_box(roi):
+    """
+    ROI (x, y, w, h) -> (对齐 MCU 的局部解码窗口 (x, y, w, h), ROI 在窗口内的偏移 (dx, dy))。
+    ROI 配置固定，调用方在 configure() 时计算一次即可。
+    """
+    rx, ry, rw, rh = roi
+    ax, ay = rx - rx % JPEG_MCU_SIZE, ry - ry % JPEG_MCU_SIZE
+    return (ax, ay, rx + rw - ax, ry + rh - ay), (rx - ax, ry - ay)
+
+
+def decode_gray_region(img_bytes, mcu_box, offset, size):
+    """
+    用 libjpeg-turbo 只解码 mcu_box 内的灰度块，避免整帧解码，返回 ROI 部分的 (h, w) uint8 数组。
+    不可用或失败 (非 JPEG / ROI 越界) 时返回 None，由调用方走 PIL 整帧解码兜底。
+    """
+    w, h = size
+    if _TURBO_JPEG is None or w <= 0 or h <= 0:
+        return None
+    try:
+        bx, by, bw, bh = mcu_box
+        block_jpeg = _TURBO_JPEG.crop(img_bytes, bx, by, bw, bh, gray=True)
+        block = _TURBO_JPEG.decode(block_jpeg, pixel_format=TJPF_GRAY)
+        # 灰度解码通常为 (h, w, 1)，个别版本直接返回 (h, w)
+        if block.ndim == 3:
+            block = block[:, :, 0]
+        ox, oy = offset
+        region = block[oy:oy + h, ox:ox + w]
+        # 裁剪出的块比预期小 (ROI 越界等) 时同样回退
+        return region if region.shape == (h, w) else None
+    except Exception:
+        return None
+
+
+def otsu_threshold(hist) -> int:
+    """
+    Otsu 阈值: 对 256 个候选阈值一次性向量化计算类间方差。
+    hist 为 256 级灰度直方图 (如 PIL Image.histogram() 的结果)。
+    """
+    hist = np.asarray(hist, dtype=np.int64)
+    weight_background = np.cumsum(hist)
+    sum_foreground = np.cumsum(_LEVELS * hist)
+    weight_foreground = weight_background[-1] - weight_background
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_bg = sum_foreground / weight_background
+        mean_fg = (sum_foreground[-1] - sum_foreground) / weight_foreground
+        between_class_variance = weight_background * weight_foreground * ((mean_bg - mean_fg) ** 2)
+
+    # 任一类为空的阈值无效; argmax 取第一个最大值，与逐个比较 ">" 的结果一致
+    between_class_variance[(weight_background == 0) | (weight_foreground == 0)] = 0
+    return int(np.argmax(between_class_variance))
+
+
+@lru_cache(maxsize=32)
+def _otsu_from_key(hist_key: bytes) -> int:
+    return otsu_threshold(np.frombuffer(hist_key, dtype=np.int64))
+
+
+def cached_otsu_threshold(hist) -> int:
+    """
+    带缓存的 Otsu 阈值。显示屏画面和光照基本静止，连续帧的直方图经常完全相同，
+    以直方图字节为键直接复用上次的结果。
+    """
+    return _otsu_from_key(np.asarray(hist, dtype=np.int64).tobytes())
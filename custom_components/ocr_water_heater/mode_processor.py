@@ -1,16 +1,28 @@
 """Mode Processing logic for OCR Water Heater (PIL/Numpy Version)."""
 import logging
-import io
+from functools import lru_cache
 import numpy as np
 from PIL import Image, ImageOps
 
 from .const import (
     MODE_LOW_POWER, MODE_HALF, MODE_FULL, MODE_SETTING, MODE_STANDBY,
-    MODE_ACTIVE_RATIO, DEFAULT_ROI_PANEL, DEFAULT_GAMMA, DEFAULT_NOISE_LIMIT
+    MODE_ACTIVE_RATIO, DEFAULT_ROI_PANEL, DEFAULT_GAMMA, DEFAULT_NOISE_LIMIT,
+    DEFAULT_DEBUG_MODE
 )
+from .image_utils import cached_otsu_threshold, mcu_aligned_box, decode_gray_region, GrayFrame
 
 _LOGGER = logging.getLogger(__name__)
 
+# 互斥运行模式: (子 ROI 名称, 模式)，顺序即平分时的优先级
+EXCLUSIVE_MODES = (('low', MODE_LOW_POWER), ('half', MODE_HALF), ('full', MODE_FULL))
+
+@lru_cache(maxsize=64)
+def _contrast_lut(min_val: int, max_val: int, gamma: float) -> tuple:
+    """生成 [min_val, max_val] 线性拉伸 + Gamma 的 256 级查找表 (按参数缓存)"""
+    img_norm = np.clip((np.arange(256) - min_val) / (max_val - min_val) * 255.0, 0, 255)
+    img_gamma = np.power(img_norm / 255.0, gamma) * 255.0
+    return tuple(img_gamma.astype(np.uint8).tolist())
+
 class ModeProcessor:
     """
     使用局部 Otsu + Gamma 增强 + 动态底噪门限 (PIL Version).
@@ -21,12 +33,27 @@ class ModeProcessor:
         self.sub_rois = {}
         self.ocr_roi = None
         self.gamma = DEFAULT_GAMMA
-
-    def configure(self, panel_roi: tuple, sub_rois: dict, ocr_roi: tuple, gamma: float = DEFAULT_GAMMA):
+        self.debug_mode = DEFAULT_DEBUG_MODE
+        # 由 configure() 预先计算的面板内切片 (_slice_modes 为 None 表示尚未配置)
+        self._slice_set = None
+        self._slice_ocr = None
+        self._slice_modes = None
+        self._panel_mcu_box, self._panel_mcu_offset = mcu_aligned_box(DEFAULT_ROI_PANEL)
+
+    def configure(self, panel_roi: tuple, sub_rois: dict, ocr_roi: tuple, gamma: float = DEFAULT_GAMMA,
+                  debug_mode: bool = DEFAULT_DEBUG_MODE):
         self.panel_roi = panel_roi
         self.sub_rois = sub_rois
         self.ocr_roi = ocr_roi
         self.gamma = gamma
+        # 关闭调试时不生成任何调试图
+        self.debug_mode = debug_mode
+        # ROI 配置固定，面板内的相对切片只需计算一次
+        self._slice_set = self._get_roi_slice(sub_rois['setting'])
+        self._slice_ocr = self._get_roi_slice(ocr_roi)
+        self._slice_modes = tuple(self._get_roi_slice(sub_rois[mode_key]) for mode_key, _ in EXCLUSIVE_MODES)
+        # 面板对齐 MCU 的局部解码窗口
+        self._panel_mcu_box, self._panel_mcu_offset = mcu_aligned_box(panel_roi)
 
     def _get_relative_roi(self, abs_roi):
         """将绝对坐标转换为相对于 panel_roi 的坐标"""
@@ -40,135 +67,122 @@ class ModeProcessor:
         
         return (rx, ry, rw, rh)
 
+    def _get_roi_slice(self, abs_roi):
+        """绝对坐标 ROI -> 面板数组上的 (行, 列) 切片，空区域返回 None"""
+        x, y, w, h = self._get_relative_roi(abs_roi)
+        if w <= 0 or h <= 0:
+            return None
+        return (slice(y, y + h), slice(x, x + w))
+
     def _enhance_contrast(self, image_pil):
-        """Gamma 增强"""
-        img_arr = np.array(image_pil, dtype=float)
-        min_val = np.min(img_arr)
-        max_val = np.max(img_arr)
+        """Gamma 增强 (查表，同一亮度范围只计算一次)"""
+        min_val, max_val = image_pil.getextrema()
         
         if max_val - min_val < 5:
             return image_pil 
             
-        img_norm = (img_arr - min_val) / (max_val - min_val) * 255.0
-        img_gamma = np.power(img_norm / 255.0, self.gamma) * 255.0
-        
-        return Image.fromarray(img_gamma.astype(np.uint8))
-
-    def _get_otsu_threshold(self, img_pil):
-        """手动实现 Otsu 阈值"""
-        if img_pil.mode != 'L':
-            img_pil = img_pil.convert('L')
-            
-        hist = img_pil.histogram()
-        total = sum(hist)
-        current_max, threshold = 0, 0
-        sum_total, sum_foreground, weight_background, weight_foreground = 0, 0, 0, 0
-
-        for i in range(256):
-            sum_total += i * hist[i]
-
-        for i in range(256):
-            weight_background += hist[i]
-            if weight_background == 0: continue
-            weight_foreground = total - weight_background
-            if weight_foreground == 0: break
-
-            sum_foreground += i * hist[i]
-            mean_bg = sum_foreground / weight_background
-            mean_fg = (sum_total - sum_foreground) / weight_foreground
-            between_class_variance = weight_background * weight_foreground * ((mean_bg - mean_fg) ** 2)
-            
-            if between_class_variance > current_max:
-                current_max = between_class_variance
-                threshold = i
-        return threshold
-
-    def _analyze_roi_local(self, gray_panel_pil, rel_roi, debug_name, debug_store):
-        """局部二值化分析"""
-        x, y, w, h = rel_roi
-        if w <= 0 or h <= 0: return 0.0
+        return image_pil.point(_contrast_lut(min_val, max_val, self.gamma))
+
+    def _analyze_roi_local(self, panel_arr, roi_slice, debug_name, debug_store):
+        """
+        局部二值化分析。
+        只遍历一次像素生成直方图，最大亮度、Otsu 阈值和亮像素数都从直方图得出。
+        """
+        if roi_slice is None: return 0.0
         
-        roi_img = gray_panel_pil.crop((x, y, x + w, y + h))
-        roi_arr = np.array(roi_img)
+        roi_arr = panel_arr[roi_slice]
         if roi_arr.size == 0: return 0.0
 
-        max_val = np.max(roi_arr)
+        hist = np.bincount(roi_arr.ravel(), minlength=256)
+        max_val = np.flatnonzero(hist)[-1]
         if max_val < DEFAULT_NOISE_LIMIT: 
             return 0.0
 
-        thresh_val = self._get_otsu_threshold(roi_img)
-        roi_binary = roi_img.point(lambda p: 255 if p > thresh_val else 0)
+        thresh_val = cached_otsu_threshold(hist)
+        # >阈值为亮像素
+        lit_count = hist[thresh_val + 1:].sum()
         
-        debug_store[f"05_{debug_name}_Bin_{int(thresh_val)}.jpg"] = roi_binary
+        if self.debug_mode:
+            debug_store[f"05_{debug_name}_Bin_{thresh_val}.jpg"] = Image.fromarray((roi_arr > thresh_val).astype(np.uint8) * 255)
 
-        bin_arr = np.array(roi_binary)
-        lit_pixels = np.count_nonzero(bin_arr == 255)
+        return lit_count / roi_arr.size
+
+    def _crop_panel(self, frame):
+        """从整帧裁剪面板 (越界部分截掉)，面板为空时返回 None"""
+        img_origin = frame.image
         
-        return lit_pixels / bin_arr.size
+        px, py, pw, ph = self.panel_roi
+        w_orig, h_orig = img_origin.size
+        left = max(0, min(px, w_orig))
+        top = max(0, min(py, h_orig))
+        right = min(left + pw, w_orig)
+        bottom = min(top + ph, h_orig)
+        
+        if right - left <= 0 or bottom - top <= 0:
+            return None
+            
+        return img_origin.crop((left, top, right, bottom))
 
     def process(self, image_bytes):
+        """image_bytes 可以是原始字节，也可以是与 OCRProcessor 共享的 GrayFrame"""
         debug_imgs = {}
-        if not image_bytes:
+        frame = GrayFrame.wrap(image_bytes)
+        if not frame.data:
             return None, debug_imgs
 
         try:
-            img_origin = Image.open(io.BytesIO(image_bytes))
-            
-            # 裁剪面板
-            px, py, pw, ph = self.panel_roi
-            w_orig, h_orig = img_origin.size
-            left = max(0, min(px, w_orig))
-            top = max(0, min(py, h_orig))
-            right = min(left + pw, w_orig)
-            bottom = min(top + ph, h_orig)
-            
-            if right - left <= 0 or bottom - top <= 0:
+            assert self._slice_modes is not None, "ModeProcessor.configure() 尚未调用"
+
+            # 优先只解码面板所在的 JPEG 块，失败时整帧解码后裁剪
+            _, _, pw, ph = self.panel_roi
+            panel_arr = decode_gray_region(frame.data, self._panel_mcu_box, self._panel_mcu_offset, (pw, ph))
+            panel_img = Image.fromarray(panel_arr) if panel_arr is not None else self._crop_panel(frame)
+            if panel_img is None:
                 return MODE_STANDBY, debug_imgs
-                
-            panel_img = img_origin.crop((left, top, right, bottom))
-            debug_imgs["01_Panel.jpg"] = panel_img
 
-            # 增强
-            gray_panel = panel_img.convert("L")
+            if self.debug_mode:
+                debug_imgs["01_Panel.jpg"] = panel_img
+
+            # 增强 (非 JPEG 来源仍需转灰度)
+            gray_panel = panel_img if panel_img.mode == "L" else panel_img.convert("L")
             enhanced_panel = self._enhance_contrast(gray_panel)
-            debug_imgs[f"02_Enhanced_G{self.gamma}.jpg"] = enhanced_panel
+            if self.debug_mode:
+                debug_imgs[f"02_Enhanced_G{self.gamma}.jpg"] = enhanced_panel
+
+            # 各 ROI 直接在同一数组上切片 (视图，无拷贝)
+            panel_arr = np.asarray(enhanced_panel)
 
             # 全局亮度初筛
-            if np.max(np.array(enhanced_panel)) < DEFAULT_NOISE_LIMIT:
+            if panel_arr.max() < DEFAULT_NOISE_LIMIT:
                 return MODE_STANDBY, debug_imgs
 
             # === 修改顺序 ===
             
             # 1. 优先检查：正在设置
             # 如果 SET 亮了，说明屏幕肯定是亮着的，不需要管 OCR 分数
-            rel_set = self._get_relative_roi(self.sub_rois['setting'])
-            set_score = self._analyze_roi_local(enhanced_panel, rel_set, "SET", debug_imgs)
+            set_score = self._analyze_roi_local(panel_arr, self._slice_set, "SET", debug_imgs)
             
             if set_score > MODE_ACTIVE_RATIO:
                 return MODE_SETTING, debug_imgs
 
             # 2. 其次检查：OCR 区域安全锁
             # 如果不是在设置，且数字区域全黑，那才是真的待机
-            rel_ocr = self._get_relative_roi(self.ocr_roi)
-            ocr_ratio = self._analyze_roi_local(enhanced_panel, rel_ocr, "OCR", debug_imgs)
+            ocr_ratio = self._analyze_roi_local(panel_arr, self._slice_ocr, "OCR", debug_imgs)
             
             if ocr_ratio < 0.10:
                 # _LOGGER.debug(f"OCR too dark ({ocr_ratio:.2f}), forcing STANDBY")
                 return MODE_STANDBY, debug_imgs
 
             # 3. 最后检查：互斥模式 (Low/Half/Full)
-            scores = {}
-            for mode_key in ['low', 'half', 'full']:
-                rel = self._get_relative_roi(self.sub_rois[mode_key])
-                scores[mode_key] = self._analyze_roi_local(enhanced_panel, rel, f"Mode_{mode_key}", debug_imgs)
-            
-            best_mode = max(scores, key=scores.get)
-            best_score = scores[best_mode]
-
-            if best_score > MODE_ACTIVE_RATIO:
-                if best_mode == 'low': return MODE_LOW_POWER, debug_imgs
-                if best_mode == 'half': return MODE_HALF, debug_imgs
-                if best_mode == 'full': return MODE_FULL, debug_imgs
+            scores = np.fromiter(
+                (self._analyze_roi_local(panel_arr, roi_slice, f"Mode_{mode_key}", debug_imgs)
+                 for (mode_key, _), roi_slice in zip(EXCLUSIVE_MODES, self._slice_modes)),
+                dtype=np.float64, count=len(EXCLUSIVE_MODES)
+            )
+            best_idx = int(np.argmax(scores))
+
+            if scores[best_idx] > MODE_ACTIVE_RATIO:
+                return EXCLUSIVE_MODES[best_idx][1], debug_imgs
 
             return MODE_STANDBY, debug_imgs
 
@@ -1,15 +1,16 @@
 """OCR Processing logic (No-OpenCV / PIL Version)."""
 import logging
-import io
+import threading
 import numpy as np
-from PIL import Image, ImageOps, ImageDraw
+from PIL import Image, ImageDraw
 
 from .const import (
-    DEFAULT_ROI, DEFAULT_SKEW,
+    DEFAULT_ROI, DEFAULT_SKEW, DEFAULT_DEBUG_MODE,
     OCR_MIN_PEAK_BRIGHTNESS,
     VALID_MIN, VALID_MAX,
     DEBUG_DIR_ROOT
 )
+from .image_utils import cached_otsu_threshold, mcu_aligned_box, decode_gray_region, GrayFrame
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -61,156 +62,186 @@ VALIDATION_SPOTS = {
     'check_bot_d0':  (24, 24, 2, 2)
 }
 
+# 所有检测框 (x, y, w, h) 一次性批量计算: 先是验证点，再是十位 a~g、个位 a~g
+SEGMENT_ORDER = ('a', 'b', 'c', 'd', 'e', 'f', 'g')
+VALIDATION_NAMES = tuple(VALIDATION_SPOTS)
+CHECK_RECTS = np.array(
+    list(VALIDATION_SPOTS.values())
+    + [(*LOCAL_SEGMENTS[f"{seg}{pos}"], *SEGMENT_SIZE) for pos in ('1', '0') for seg in SEGMENT_ORDER],
+    dtype=np.intp
+)
+
+# 七段状态 (a~g 依次为 bit0~bit6) 编码成 0~127 后直接查表，未定义的组合为 "?"
+SEGMENT_BIT_WEIGHTS = 1 << np.arange(len(SEGMENT_ORDER))
+SEGMENT_LUT = tuple(
+    SEGMENT_MAP.get(tuple((code >> i) & 1 for i in range(len(SEGMENT_ORDER))), "?")
+    for code in range(1 << len(SEGMENT_ORDER))
+)
+
+
+def _zone_layout(rects, w, h):
+    """
+    预先计算各检测框在 (h+1, w+1) 积分图上的四角索引 (ROI 尺寸固定，configure 时算一次)。
+    返回 ((y0, x0, y1, x1, total), valid)，超出 ROI 的框四角都指向 0，占比恒为 0。
+    """
+    x, y, zw, zh = rects.T
+    total = zw * zh
+    valid = (x >= 0) & (y >= 0) & (x + zw <= w) & (y + zh <= h) & (total > 0)
+    corners = (
+        np.where(valid, y, 0), np.where(valid, x, 0),
+        np.where(valid, y + zh, 0), np.where(valid, x + zw, 0),
+        np.where(valid, total, 1),
+    )
+    return corners, valid
+
+
+def _zone_black_ratios(np_bin, corners, integral):
+    """用积分图一次算出所有检测框内的黑色 (非 255) 像素占比，integral 首行首列须为 0"""
+    np.cumsum(np.cumsum(np_bin != 255, axis=0), axis=1, out=integral[1:, 1:])
+    y0, x0, y1, x1, total = corners
+    black = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+    return black / total
+
 
 class OCRProcessor:
     """Class to handle OCR logic using PIL only (No OpenCV)."""
 
     def __init__(self):
-        self._roi = DEFAULT_ROI
-        self._skew = DEFAULT_SKEW
+        # ROI / 二值化缓冲区在帧间复用，同一实例的帧处理必须串行
+        self._lock = threading.Lock()
+        self.configure(DEFAULT_ROI, DEFAULT_SKEW)
 
-    def configure(self, roi, skew):
+    def configure(self, roi, skew, debug_mode=DEFAULT_DEBUG_MODE):
         """Update parameters."""
-        self._roi = roi
-        self._skew = skew
+        rx, ry, rw, rh = roi
+        # ROI 几何信息与缓冲区必须一起替换，否则并发的 process_image 可能拿到新框 + 旧缓冲区
+        with self._lock:
+            self._roi = roi
+            self._skew = skew
+            # 关闭调试时不生成任何调试图
+            self._debug_mode = debug_mode
+            # ROI 在配置后固定，裁剪框只需计算一次
+            self._crop_box = (rx, ry, rx + rw, ry + rh)
+            # 对齐 MCU 的局部解码窗口，以及 ROI 在窗口内的偏移
+            self._mcu_box, self._mcu_offset = mcu_aligned_box(roi)
+            # 预分配的 ROI 灰度 / 二值化缓冲区，每帧直接写入
+            self._roi_buf = np.empty((max(rh, 0), max(rw, 0)), dtype=np.uint8)
+            self._bin_buf = np.empty_like(self._roi_buf)
+            # 检测框索引只取决于 ROI 尺寸; 积分图首行首列保持为 0
+            self._zone_corners, self._zone_valid = _zone_layout(CHECK_RECTS, max(rw, 0), max(rh, 0))
+            self._integral_buf = np.zeros((max(rh, 0) + 1, max(rw, 0) + 1), dtype=np.intp)
 
-    def _get_otsu_threshold(self, img_gray):
+    def _decode_roi_gray(self, img_bytes, out):
         """
-        手动实现 Otsu 阈值算法
+        用 libjpeg-turbo 只解码 ROI 附近的灰度块，避免整帧解码，结果写入 out。
+        不可用或失败 (非 JPEG / ROI 越界) 时返回 False，由 PIL 整帧解码兜底。
         """
-        hist = img_gray.histogram()
-        total = sum(hist)
-        current_max, threshold = 0, 0
-        sum_total, sum_foreground, weight_background, weight_foreground = 0, 0, 0, 0
+        _, _, rw, rh = self._roi
+        region = decode_gray_region(img_bytes, self._mcu_box, self._mcu_offset, (rw, rh))
+        if region is None:
+            return False
+        np.copyto(out, region)
+        return True
 
-        for i in range(256):
-            sum_total += i * hist[i]
-
-        for i in range(256):
-            weight_background += hist[i]
-            if weight_background == 0: continue
-            weight_foreground = total - weight_background
-            if weight_foreground == 0: break
-
-            sum_foreground += i * hist[i]
-            
-            mean_bg = sum_foreground / weight_background
-            mean_fg = (sum_total - sum_foreground) / weight_foreground
-            
-            between_class_variance = weight_background * weight_foreground * ((mean_bg - mean_fg) ** 2)
-            
-            if between_class_variance > current_max:
-                current_max = between_class_variance
-                threshold = i
-
-        return threshold
+    def _get_otsu_threshold(self, hist):
+        """由直方图求 Otsu 阈值，同时返回 <=阈值 (暗类) 的像素数"""
+        thresh_val = cached_otsu_threshold(hist)
+        return thresh_val, int(hist[:thresh_val + 1].sum())
 
     def process_image(self, img_bytes):
         """
         Main function. Processes image using PIL and Heuristic Segment Analysis.
+        img_bytes 可以是原始字节，也可以是与 ModeProcessor 共享的 GrayFrame。
         Returns: (int_value, debug_imgs_dict)
         """
-        debug_imgs = {}
-        if not img_bytes:
-            return None, debug_imgs
+        with self._lock:
+            return self._process_image(GrayFrame.wrap(img_bytes))
 
-        try:
-            full_img = Image.open(io.BytesIO(img_bytes))
-        except Exception as e:
-            _LOGGER.error(f"Failed to open image: {e}")
+    def _process_image(self, frame):
+        debug_imgs = {}
+        if not frame.data:
             return None, debug_imgs
 
-        # 1. 裁剪 ROI
+        # 1. 裁剪 ROI 到预分配缓冲区 (优先局部解码)
         rx, ry, rw, rh = self._roi
-        crop_box = (rx, ry, rx + rw, ry + rh)
-        
-        try:
-            ocr_img = full_img.crop(crop_box).convert("L")
-            debug_imgs["01_Crop_Gray.jpg"] = ocr_img
-        except Exception as e:
-            _LOGGER.error(f"Crop failed: {e}")
-            return None, debug_imgs
+        np_img = self._roi_buf
 
-        # 2. 亮度检查
-        np_img = np.array(ocr_img)
-        max_val = np.max(np_img) if np_img.size > 0 else 0
+        if not self._decode_roi_gray(frame.data, np_img):
+            try:
+                full_img = frame.image
+            except Exception as e:
+                _LOGGER.error(f"Failed to open image: {e}")
+                return None, debug_imgs
+
+            try:
+                crop = full_img.crop(self._crop_box)
+                # JPEG 已按亮度解码，只有非 JPEG 来源才需要转灰度
+                np.copyto(np_img, np.asarray(crop if crop.mode == "L" else crop.convert("L")))
+            except Exception as e:
+                _LOGGER.error(f"Crop failed: {e}")
+                return None, debug_imgs
+
+        # 缓冲区下一帧会被覆盖，调试图需另存副本
+        if self._debug_mode:
+            debug_imgs["01_Crop_Gray.jpg"] = Image.fromarray(np_img.copy())
+
+        # 2. 亮度检查 (最大亮度直接从直方图读出，直方图随后复用于 Otsu)
+        hist = np.bincount(np_img.ravel(), minlength=256)
+        present_levels = np.flatnonzero(hist)
+        max_val = present_levels[-1] if present_levels.size > 0 else 0
         
         if max_val < OCR_MIN_PEAK_BRIGHTNESS:
             # 屏幕太暗，直接跳过
-            debug_imgs["00_Skipped_Dark.jpg"] = ocr_img
+            if self._debug_mode:
+                debug_imgs["00_Skipped_Dark.jpg"] = debug_imgs["01_Crop_Gray.jpg"]
             return None, debug_imgs
 
         # 3. Otsu 二值化
-        thresh_val = self._get_otsu_threshold(ocr_img)
-        # >阈值变255(白), <阈值变0(黑)
-        binary_img = ocr_img.point(lambda p: 255 if p > thresh_val else 0)
-        
+        thresh_val, dark_pixels = self._get_otsu_threshold(hist)
+
         # 4. 背景统一 (确保白底黑字)
-        np_bin = np.array(binary_img)
-        white_pixels = np.count_nonzero(np_bin == 255)
-        total_pixels = np_bin.size
-        
-        if white_pixels < (total_pixels * 0.5):
-            binary_img = ImageOps.invert(binary_img)
-            np_bin = np.array(binary_img)
+        # 亮像素数直接由直方图得出，不足一半说明是黑底亮字，二值化时直接反向比较
+        total_pixels = np_img.size
+        white_pixels = total_pixels - dark_pixels
+        invert = white_pixels < (total_pixels * 0.5)
+
+        # 背景变255(白), 笔画变0(黑)，直接写入预分配缓冲区
+        np_bin = self._bin_buf
+        (np.less_equal if invert else np.greater)(np_img, thresh_val, out=np_bin)
+        np_bin *= 255
 
-        # 准备画板
-        canvas = binary_img.convert("RGB")
-        draw = ImageDraw.Draw(canvas)
+        # 所有验证点和笔画的黑色占比一次算完 (越界的框占比为 0)
+        ratios = _zone_black_ratios(np_bin, self._zone_corners, self._integral_buf)
+        active = (ratios >= ACTIVE_RATIO).astype(np.uint8)
+        n_spots = len(VALIDATION_NAMES)
 
         # === 5. 特征点噪声验证 (新增) ===
         # 如果这些本该是空白的地方被检测出黑色，说明这是一张噪点图
-        noise_detected = False
-        for name, (vx, vy, vw, vh) in VALIDATION_SPOTS.items():
-            # 边界检查
-            if vx < 0 or vy < 0 or vx + vw > rw or vy + vh > rh: continue
-
-            # 提取区域
-            zone = np_bin[vy : vy + vh, vx : vx + vw]
-            
-            # 检查黑色占比
-            zone_total = zone.size
-            zone_white = np.count_nonzero(zone == 255)
-            zone_black = zone_total - zone_white
-            ratio = zone_black / zone_total if zone_total > 0 else 0
-
-            # 画框框 (黄色表示检查点)
-            draw.rectangle([vx, vy, vx + vw - 1, vy + vh - 1], outline=(255, 255, 0))
-
-            if ratio >= ACTIVE_RATIO:
-                _LOGGER.debug(f"Noise Check Failed: {name} is active (Ratio: {ratio:.2f})")
-                noise_detected = True
-                # 只要有一个点挂了，就认为是噪点图，但为了画出完整的 debug 图，我们不在这里立刻 return
-                # 而是标记一下，最后统一处理
+        noise_detected = bool(active[:n_spots].any())
+        if noise_detected:
+            for name, ratio in zip(VALIDATION_NAMES, ratios[:n_spots]):
+                if ratio >= ACTIVE_RATIO:
+                    _LOGGER.debug("Noise Check Failed: %s is active (Ratio: %.2f)", name, ratio)
 
         # === 6. 识别逻辑 (七段数码管) ===
-        digits_result = {}
-        seg_order = ['a', 'b', 'c', 'd', 'e', 'f', 'g']
-        
-        for pos in ['1', '0']:
-            states = []
-            for seg in seg_order:
-                key = f"{seg}{pos}"
-                lx, ly = LOCAL_SEGMENTS.get(key, (0, 0))
-                sw, sh = SEGMENT_SIZE
-                
-                if lx < 0 or ly < 0 or lx + sw > rw or ly + sh > rh:
-                    states.append(0)
-                    continue
-                
-                zone = np_bin[ly : ly + sh, lx : lx + sw]
-                zone_total = zone.size
-                zone_white = np.count_nonzero(zone == 255)
-                zone_black = zone_total - zone_white
-                ratio = zone_black / zone_total if zone_total > 0 else 0
-                
-                is_active = 1 if ratio >= ACTIVE_RATIO else 0
-                states.append(is_active)
-                
-                color = (0, 255, 0) if is_active else (255, 0, 0)
-                draw.rectangle([lx, ly, lx + sw - 1, ly + sh - 1], outline=color)
-
-            digits_result[pos] = SEGMENT_MAP.get(tuple(states), "?")
+        code_ten, code_one = (active[n_spots:].reshape(2, -1) @ SEGMENT_BIT_WEIGHTS).tolist()
+        digits_result = {'1': SEGMENT_LUT[code_ten], '0': SEGMENT_LUT[code_one]}
+
+        # 画框框 (仅调试模式): 直接在 RGB 数组上描边，黄色为验证点，绿色/红色为笔画亮/灭
+        overlay = None
+        if self._debug_mode:
+            overlay = np.repeat(np_bin[:, :, None], 3, axis=2)
+            for i, (zx, zy, zw, zh) in enumerate(CHECK_RECTS.tolist()):
+                if not self._zone_valid[i]: continue
+                if i < n_spots:
+                    color = (255, 255, 0)
+                else:
+                    color = (0, 255, 0) if active[i] else (255, 0, 0)
+                x1, y1 = zx + zw - 1, zy + zh - 1
+                overlay[zy, zx:x1 + 1] = color
+                overlay[y1, zx:x1 + 1] = color
+                overlay[zy:y1 + 1, zx] = color
+                overlay[zy:y1 + 1, x1] = color
 
         # === 7. 结果输出 ===
         
@@ -237,13 +268,14 @@ class OCRProcessor:
             except ValueError:
                 final_val = None
 
-        # 保存放大图
-        large_canvas = canvas.resize((rw * 5, rh * 5), resample=Image.NEAREST)
-        draw_large = ImageDraw.Draw(large_canvas)
-        try:
-            draw_large.text((5, 5), res_str, fill=(0, 255, 255))
-        except IOError: pass
+        # 保存放大图 (5 倍最近邻放大)
+        if overlay is not None:
+            large_canvas = Image.fromarray(overlay.repeat(5, axis=0).repeat(5, axis=1))
+            draw_large = ImageDraw.Draw(large_canvas)
+            try:
+                draw_large.text((5, 5), res_str, fill=(0, 255, 255))
+            except IOError: pass
 
-        debug_imgs[f"02_Result_{res_str}.jpg"] = large_canvas
+            debug_imgs[f"02_Result_{res_str}.jpg"] = large_canvas
 
         return final_val, debug_imgs
\ No newline at end of file
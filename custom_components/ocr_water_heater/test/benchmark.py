@@ -4,17 +4,19 @@ OCR Water Heater Benchmark Script
 """
 import time
 import requests
-import statistics
 import sys
 import os
 import logging
-import datetime
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # ================= 配置区域 =================
 # 改为 Frigate 的 API (速度极快)
 IMAGE_URL = "http://192.168.123.86:5000/api/reshuiqi/latest.jpg"
 
 TEST_ITERATIONS = 50  # 测试次数
+INTERVAL = 0.5  # 采样间隔 (秒)
 
 # 秒数显示的 ROI 区域 (x, y, w, h)
 ROI = (383, 51, 34, 28) 
@@ -22,8 +24,19 @@ ROI = (383, 51, 34, 28)
 SKEW = 0.0 # 识别OSD通常不需要倾斜校正，设为0即可，如果有倾斜可改回 8.0
 # ===========================================
 
-logging.basicConfig(level=logging.INFO, format='%(message)s')
+# 只配置本脚本的 logger，作为模块导入时不改动 root logger (HA 的日志配置)
 logger = logging.getLogger("Benchmark")
+logger.setLevel(logging.INFO)
+# 已挂自己的 handler，不再向 root 传递，避免外部 basicConfig 时每行打印两次
+logger.propagate = False
+_handler = logging.StreamHandler()
+_handler.setFormatter(logging.Formatter('%(message)s'))
+logger.addHandler(_handler)
+
+# 复用 TCP 连接 (keep-alive)，避免每次请求都重新握手拖高 Fetch 耗时
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+SESSION.headers["Connection"] = "keep-alive"
 
 # 动态路径处理
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -48,6 +61,22 @@ except ImportError as e:
     print("python3 -m custom_components.ocr_water_heater.benchmark")
     sys.exit(1)
 
+def _wrap_seconds(sys_sec, cam_sec):
+    """
+    计算秒数差，处理跨分钟的情况 (例如系统01秒，摄像头59秒，延迟2秒)。
+    差值超过 30 秒时按负延迟显示 (摄像头快了，或时钟没对准)，结果范围 -29 ~ 30。
+    """
+    lag = (sys_sec - cam_sec) % 60
+    return lag - 60 * (lag > 30)
+
+def fetch_frame():
+    """下载一帧图片，并记录发起请求时的系统秒数 (在预取线程中执行)"""
+    sys_sec = time.time_ns() // 1_000_000_000 % 60
+    t0 = time.perf_counter()
+    resp = SESSION.get(IMAGE_URL, timeout=(1, 3))
+    t1 = time.perf_counter()
+    return sys_sec, t0, t1, resp
+
 def run_benchmark():
     logger.info("=" * 60)
     logger.info("🚀 OCR 延迟与同步测试 (Frigate Source)")
@@ -60,24 +89,31 @@ def run_benchmark():
     processor = OCRProcessor()
     processor.configure(roi=ROI, skew=SKEW)
 
-    fetch_times = []
-    lags = []
+    # 预分配结果数组，fi / li 为已写入的数量
+    fetch_times = np.empty(TEST_ITERATIONS, dtype=np.float32)
+    lags = np.empty(TEST_ITERATIONS, dtype=np.int8)
+    fi, li = 0, 0
     success_count = 0
 
     logger.info("🏁 测试开始...")
     logger.info(f"{'Fetch(ms)':<10} | {'OCR(ms)':<8} | {'Sys Sec':<8} | {'Cam Sec':<8} | {'Lag(s)':<8}")
     logger.info("-" * 60)
 
+    # 单槽预取: 后台线程下载第 N+1 帧的同时，主线程识别第 N 帧
+    pool = ThreadPoolExecutor(max_workers=1)
+    future = pool.submit(fetch_frame)
+
+    next_tick = time.perf_counter()
+
     for i in range(1, TEST_ITERATIONS + 1):
         try:
-            # 1. 获取系统时间 (秒)
-            now = datetime.datetime.now()
-            sys_sec = now.second
-
-            # 2. 下载图片
-            t0 = time.time()
-            resp = requests.get(IMAGE_URL, timeout=5)
-            t1 = time.time()
+            # 1. 取回预取的图片 (系统秒数在发起下载时已记录)
+            try:
+                sys_sec, t0, t1, resp = future.result()
+            finally:
+                # 2. 立即预取下一帧
+                if i < TEST_ITERATIONS:
+                    future = pool.submit(fetch_frame)
             
             if resp.status_code != 200:
                 logger.warning(f"请求失败: {resp.status_code}")
@@ -85,51 +121,54 @@ def run_benchmark():
 
             # 3. OCR 识别
             # process_image 返回 (val, debug_imgs)
+            t2 = time.perf_counter()
             cam_sec, _ = processor.process_image(resp.content)
-            t2 = time.time()
+            t3 = time.perf_counter()
 
             # 4. 数据计算
             fetch_time = (t1 - t0) * 1000
-            ocr_time = (t2 - t1) * 1000
-            fetch_times.append(fetch_time)
+            ocr_time = (t3 - t2) * 1000
+            fetch_times[fi] = fetch_time
+            fi += 1
 
             # 5. 计算延迟 (Lag)
             lag_str = "N/A"
             if cam_sec is not None:
                 success_count += 1
-                # 计算秒数差，处理跨分钟的情况 (例如系统01秒，摄像头59秒，延迟2秒)
-                # 公式：(系统秒 - 摄像头秒 + 60) % 60
-                lag = (sys_sec - cam_sec + 60) % 60
-                
-                # 如果误差非常大（比如超过30秒），可能是时钟没对准，或者是负延迟（摄像头快了?）
-                if lag > 30:
-                    lag = lag - 60 # 显示为负数
-                
-                lags.append(lag)
+                lag = _wrap_seconds(sys_sec, cam_sec)
+                lags[li] = lag
+                li += 1
                 lag_str = f"{lag}s"
             
             # 打印
             cam_sec_str = str(cam_sec) if cam_sec is not None else "None"
-            logger.info(f"{fetch_time:<10.1f} | {ocr_time:<8.1f} | {sys_sec:<8} | {cam_sec_str:<8} | {lag_str:<8}")
+            logger.info("%-10.1f | %-8.1f | %-8d | %-8s | %-8s", fetch_time, ocr_time, sys_sec, cam_sec_str, lag_str)
             
-            # 稍微sleep一下，避免刷太快
-            time.sleep(0.5)
+            # 固定节拍 sleep: 扣除本轮耗时，避免误差逐轮累积
+            next_tick += INTERVAL
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
 
         except Exception as e:
             logger.error(f"Loop error: {e}")
             time.sleep(1)
 
+    pool.shutdown(wait=False)
+
     # 统计
-    if not fetch_times:
+    if not fi:
         return
 
-    avg_fetch = statistics.mean(fetch_times)
-    avg_lag = statistics.mean(lags) if lags else 0
+    avg_fetch = float(fetch_times[:fi].mean())
+    avg_lag = float(lags[:li].mean()) if li else 0
 
     logger.info("=" * 60)
     logger.info(f"✅ 成功率: {success_count}/{TEST_ITERATIONS}")
     logger.info(f"⚡ 平均网络耗时 (Fetch): {avg_fetch:.2f} ms")
-    if lags:
+    if li:
         logger.info(f"🐢 平均画面延迟 (Lag)  : {avg_lag:.2f} 秒")
         logger.info("   (注意: 此延迟包含 '传输延迟' + '摄像头系统时钟误差')")
     logger.info("=" * 60)
@@ -4,10 +4,12 @@ OCR Water Heater Benchmark Script
 """
 import time
 import requests
-import statistics
 import sys
 import os
 import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # 配置部分 (请根据实际情况修改)
 IMAGE_URL = "http://192.168.123.86:5000/api/reshuiqi/latest.jpg"
@@ -19,6 +21,13 @@ SKEW = 8.0               # 你的倾斜角度
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger("Benchmark")
 
+# 复用 TCP 连接 (keep-alive)，否则每轮测到的 Fetch 主要是握手耗时
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+SESSION.headers["Connection"] = "keep-alive"
+# JPEG 本身已压缩，不让服务端再 gzip
+SESSION.headers["Accept-Encoding"] = "identity"
+
 # ------------------------------------------------------------------
 # 动态路径处理：为了能直接导入同级目录的模块
 # ------------------------------------------------------------------
@@ -43,6 +52,13 @@ except ImportError:
         print("python3 -m custom_components.ocr_water_heater.benchmark")
         sys.exit(1)
 
+def fetch_frame():
+    """下载一帧图片 (在预取线程中执行)，返回 (t0, t1, resp)"""
+    t0 = time.perf_counter()
+    resp = SESSION.get(IMAGE_URL, timeout=10)
+    t1 = time.perf_counter()
+    return t0, t1, resp
+
 def run_benchmark():
     logger.info("=" * 40)
     logger.info("🚀 开始 OCR 极限压力测试")
@@ -63,10 +79,10 @@ def run_benchmark():
     total_times = []
     success_count = 0
 
-    # 2. 预热 (Warmup) - 第一次运行通常较慢
+    # 2. 预热 (Warmup) - 第一次运行通常较慢，同时建立好 keep-alive 连接
     logger.info("🔥 正在预热 (Warmup)...")
     try:
-        resp = requests.get(IMAGE_URL, timeout=5)
+        resp = SESSION.get(IMAGE_URL, timeout=5)
         processor.process_image(resp.content)
     except Exception as e:
         logger.error(f"❌ 预热失败，请检查 URL 是否正确: {e}")
@@ -74,26 +90,33 @@ def run_benchmark():
 
     # 3. 正式测试循环
     logger.info("🏁 测试开始...")
+
+    # 单槽预取: 后台线程下载第 N+1 帧的同时，主线程识别第 N 帧
+    pool = ThreadPoolExecutor(max_workers=1)
+    future = pool.submit(fetch_frame)
+    bench_start = time.perf_counter()
     
     for i in range(1, TEST_ITERATIONS + 1):
         try:
-            # --- 阶段 A: 下载 ---
-            t0 = time.time()
-            resp = requests.get(IMAGE_URL, timeout=10)
+            # --- 阶段 A: 取回预取的图片，并立即预取下一帧 ---
+            try:
+                t0, t1, resp = future.result()
+            finally:
+                if i < TEST_ITERATIONS:
+                    future = pool.submit(fetch_frame)
             if resp.status_code != 200:
                 logger.warning(f"请求失败: {resp.status_code}")
                 continue
-            content = resp.content
-            t1 = time.time()
 
             # --- 阶段 B: 处理 ---
-            result, _ = processor.process_image(content)
-            t2 = time.time()
+            t2 = time.perf_counter()
+            result, _ = processor.process_image(resp.content)
+            t3 = time.perf_counter()
 
             # --- 记录数据 ---
             fetch_time = (t1 - t0) * 1000 # 转毫秒
-            ocr_time = (t2 - t1) * 1000   # 转毫秒
-            total_time = (t2 - t0) * 1000
+            ocr_time = (t3 - t2) * 1000   # 转毫秒
+            total_time = fetch_time + ocr_time  # 单帧延迟 (下载 + 处理)
 
             fetch_times.append(fetch_time)
             ocr_times.append(ocr_time)
@@ -111,16 +134,25 @@ def run_benchmark():
             logger.error(f"Error in loop {i}: {e}")
             time.sleep(0.1)
 
+    bench_elapsed = time.perf_counter() - bench_start
+    pool.shutdown(wait=False)
+
     # 4. 统计结果
     if not total_times:
         logger.error("没有成功的数据。")
         return
 
-    avg_fetch = statistics.mean(fetch_times)
-    avg_ocr = statistics.mean(ocr_times)
-    avg_total = statistics.mean(total_times)
+    fetch_arr = np.asarray(fetch_times, dtype=np.float32)
+    ocr_arr = np.asarray(ocr_times, dtype=np.float32)
+    avg_fetch = float(fetch_arr.mean())
+    avg_ocr = float(ocr_arr.mean())
+    avg_total = float(np.mean(total_times))
+    # 分位数比最小/最大值更能反映网络抖动
+    fetch_p50, fetch_p95, fetch_p99 = np.percentile(fetch_arr, [50, 95, 99])
+    ocr_p50, ocr_p95, ocr_p99 = np.percentile(ocr_arr, [50, 95, 99])
     
-    max_fps = 1000 / avg_total
+    # 下载与计算并行，吞吐由较慢的一侧决定
+    max_fps = 1000 / max(avg_fetch, avg_ocr)
     
     logger.info("\n" + "=" * 40)
     logger.info("📊 测试报告")
@@ -129,18 +161,21 @@ def run_benchmark():
     logger.info("-" * 40)
     logger.info(f"📡 网络下载 (Fetch):")
     logger.info(f"   平均: {avg_fetch:.2f} ms")
-    logger.info(f"   最小: {min(fetch_times):.2f} ms")
-    logger.info(f"   最大: {max(fetch_times):.2f} ms")
+    logger.info(f"   最小: {fetch_arr.min():.2f} ms")
+    logger.info(f"   最大: {fetch_arr.max():.2f} ms")
+    logger.info(f"   P50/P95/P99: {fetch_p50:.2f} / {fetch_p95:.2f} / {fetch_p99:.2f} ms")
     logger.info("-" * 40)
     logger.info(f"🧠 OCR 计算 (Process):")
     logger.info(f"   平均: {avg_ocr:.2f} ms")
-    logger.info(f"   最小: {min(ocr_times):.2f} ms")
-    logger.info(f"   最大: {max(ocr_times):.2f} ms")
+    logger.info(f"   最小: {ocr_arr.min():.2f} ms")
+    logger.info(f"   最大: {ocr_arr.max():.2f} ms")
+    logger.info(f"   P50/P95/P99: {ocr_p50:.2f} / {ocr_p95:.2f} / {ocr_p99:.2f} ms")
     logger.info("-" * 40)
     logger.info(f"⏱️ 总耗时 (Total):")
     logger.info(f"   平均: {avg_total:.2f} ms")
     logger.info("-" * 40)
     logger.info(f"🚀 理论极限 FPS: {max_fps:.2f} 帧/秒")
+    logger.info(f"📈 实测吞吐: {len(total_times) / bench_elapsed:.2f} 帧/秒")
     logger.info("=" * 40)
 
     # 5. 瓶颈分析建议
@@ -26,6 +26,10 @@ INTERVAL = 0.5
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s', datefmt='%H:%M:%S')
 logger = logging.getLogger("ModeTest")
 
+# 循环拉图复用同一 TCP 连接 (keep-alive)，避免每帧重新握手
+SESSION = requests.Session()
+SESSION.headers["Connection"] = "keep-alive"
+
 # 路径 hack，以便能导入同级模块
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
@@ -97,7 +101,7 @@ def run_test():
         try:
             # 下载图片
             t0 = time.time()
-            resp = requests.get(IMAGE_URL, timeout=3)
+            resp = SESSION.get(IMAGE_URL, timeout=3)
             content = resp.content
             
             # 处理
@@ -4,6 +4,7 @@
 import os
 import glob
 import time
+import numpy as np
 from PIL import Image, ImageDraw
 
 # ================= 调试配置区 (核心修改区) =================
@@ -56,31 +57,36 @@ SEGMENT_MAP = {
     (0, 0, 0, 0, 0, 0, 0): None
 }
 
-def get_states(img_crop, points):
-    w, h = img_crop.size
-    pixels = img_crop.load()
-    states = []
-    debug_str = []
-    pts_coords = []
-    
-    for key in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
-        px, py = points[key]
-        is_on = 0
-        val = 0
-        if 0 <= px < w and 0 <= py < h:
-            val = pixels[px, py]
-            if val > THRESHOLD:
-                is_on = 1
-        states.append(is_on)
-        pts_coords.append((px, py, is_on))
-        # 记录调试信息: "A:1(200)" 表示A点亮，亮度200
-        debug_str.append(f"{key}:{is_on}({val})")
-        
-    return tuple(states), pts_coords, " ".join(debug_str)
+# 采样点按 A-G 顺序展开成坐标数组，一次花式索引取出 7 个点
+SEGMENT_KEYS = ('A', 'B', 'C', 'D', 'E', 'F', 'G')
+SEG_XS = np.array([SEGMENT_POINTS[k][0] for k in SEGMENT_KEYS], dtype=np.intp)
+SEG_YS = np.array([SEGMENT_POINTS[k][1] for k in SEGMENT_KEYS], dtype=np.intp)
+# A 为最高位的 7 位编码 -> 数字 (128 项查找表，未定义的组合为 "?")
+SEG_WEIGHTS = 1 << np.arange(6, -1, -1)
+SEGMENT_LUT = ["?"] * 128
+for _states, _val in SEGMENT_MAP.items():
+    SEGMENT_LUT[int(np.dot(_states, SEG_WEIGHTS))] = _val
+
+def get_states(arr, x_off, w):
+    """在灰度数组 arr 的 [x_off, x_off + w) 列范围内采样 7 个段点"""
+    h = arr.shape[0]
+    inside = (SEG_XS >= 0) & (SEG_XS < w) & (SEG_YS >= 0) & (SEG_YS < h)
+    vals = np.zeros(len(SEGMENT_KEYS), dtype=np.uint8)
+    vals[inside] = arr[SEG_YS[inside], SEG_XS[inside] + x_off]
+    states = (inside & (vals > THRESHOLD)).astype(np.uint8)
+
+    pts_coords = list(zip(SEG_XS.tolist(), SEG_YS.tolist(), states.tolist()))
+    # 记录调试信息: "A:1(200)" 表示A点亮，亮度200
+    debug_str = " ".join(f"{k}:{on}({v})" for k, on, v in zip(SEGMENT_KEYS, states.tolist(), vals.tolist()))
+    return SEGMENT_LUT[int(states @ SEG_WEIGHTS)], pts_coords, debug_str
 
 def process_single_image(file_path):
     try:
-        img = Image.open(file_path).convert("L")
+        img = Image.open(file_path)
+        # JPEG 只解码亮度通道，省去色度上采样和颜色转换 (与 GrayFrame 相同)
+        img.draft("L", img.size)
+        img = img.convert("L") if img.mode != "L" else img
+        img.load()
     except:
         return None
 
@@ -93,11 +99,10 @@ def process_single_image(file_path):
     draw = ImageDraw.Draw(debug_img)
     
     half_w = ROI_OCR_W // 2
+    arr = np.asarray(ocr_crop, dtype=np.uint8)
     
     # 十位
-    tens_crop = ocr_crop.crop((0, 0, half_w, ROI_OCR_H))
-    tens_states, tens_pts, tens_dbg = get_states(tens_crop, SEGMENT_POINTS)
-    tens_val = SEGMENT_MAP.get(tens_states, "?")
+    tens_val, tens_pts, tens_dbg = get_states(arr, 0, half_w)
     
     for px, py, is_on in tens_pts:
         color = (0, 255, 0) if is_on else (255, 0, 0)
@@ -105,9 +110,7 @@ def process_single_image(file_path):
         draw.rectangle((px-1, py-1, px+1, py+1), outline=color)
 
     # 个位
-    ones_crop = ocr_crop.crop((half_w, 0, half_w * 2, ROI_OCR_H))
-    ones_states, ones_pts, ones_dbg = get_states(ones_crop, SEGMENT_POINTS)
-    ones_val = SEGMENT_MAP.get(ones_states, "?")
+    ones_val, ones_pts, ones_dbg = get_states(arr, half_w, half_w)
     
     for px, py, is_on in ones_pts:
         color = (0, 255, 0) if is_on else (255, 0, 0)
@@ -8,6 +8,8 @@ import numpy as np
 import requests
 import time
 import shutil
+import multiprocessing as mp
+from functools import lru_cache
 
 # ================= 配置区域 =================
 
@@ -64,65 +66,104 @@ def get_images():
                 with open(file_path, 'rb') as file:
                     images.append((f"{folder_name}_01_Panel.jpg", file.read()))
         # ---------------------------
-    return images
 
-def enhance_image(image, gamma):
-    """Gamma 增强"""
-    img_float = image.astype(float)
-    min_val, max_val = np.min(img_float), np.max(img_float)
-    if max_val - min_val < 5: return image
-    img_norm = (img_float - min_val) / (max_val - min_val) * 255.0
-    img_gamma = np.power(img_norm / 255.0, gamma) * 255.0
-    return img_gamma.astype(np.uint8)
+    # 每张图片只解码一次，所有参数组合共用同一张灰度图
+    panels = []
+    for img_name, img_bytes in images:
+        panel_gray = decode_panel(img_bytes)
+        if panel_gray is None:
+            print(f"解码失败，已跳过: {img_name}")
+            continue
+        panels.append((img_name, panel_gray))
+    return panels
 
-def process_single_case(img_name, img_bytes, gamma, noise_limit):
-    # 1. 解码
+def decode_panel(img_bytes):
+    """JPEG 字节 -> 灰度面板 (解码失败返回 None)"""
     nparr = np.frombuffer(img_bytes, np.uint8)
     panel_color = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
     if panel_color is None:
-        return
-        
-    ph, pw = panel_color.shape[:2]
-    panel_gray = cv2.cvtColor(panel_color, cv2.COLOR_BGR2GRAY)
-
-    # 2. Gamma 增强
-    panel_enhanced = enhance_image(panel_gray, gamma)
-    canvas_result = cv2.cvtColor(panel_enhanced, cv2.COLOR_GRAY2BGR)
+        return None
+    return cv2.cvtColor(panel_color, cv2.COLOR_BGR2GRAY)
 
-    # 用于汇总当前图片的各区域结果
-    roi_reports = []
+@lru_cache(maxsize=256)
+def gamma_lut(min_val, max_val, gamma):
+    """[min_val, max_val] 线性拉伸 + Gamma 的 256 级查找表 (按参数缓存)"""
+    lut = np.clip((np.arange(256) - min_val) / (max_val - min_val), 0, 1)
+    return (np.power(lut, gamma) * 255.0).astype(np.uint8)
 
-    # 3. 遍历所有 ROI
+def enhance_image(image, gamma):
+    """Gamma 增强 (8 位输入，查表代替逐像素 pow)"""
+    min_val, max_val = int(image.min()), int(image.max())
+    if max_val - min_val < 5: return image
+    return cv2.LUT(image, gamma_lut(min_val, max_val, gamma))
+
+def measure_rois(panel_enhanced):
+    """
+    计算各 ROI 的 (名称, 坐标, 最大亮度, Otsu 亮部占比)。
+    这些值与 noise_limit 无关，同一 gamma 下只需计算一次。
+    """
+    ph, pw = panel_enhanced.shape[:2]
+    roi_stats = []
     for name, (rx, ry, rw, rh) in ROIS.items():
         roi_local = panel_enhanced[max(0,ry):min(ph,ry+rh), max(0,rx):min(pw,rx+rw)]
         if roi_local.size == 0:
             continue
-            
+
         lit_ratio = 0.0
         max_val = np.max(roi_local)
-        
-        # 阈值化计算亮部分比 (注意：这里必须使用 noise_limit 过滤背景噪声)
-        if max_val >= noise_limit:
-            try:
-                _, roi_bin = cv2.threshold(roi_local, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-                lit_ratio = cv2.countNonZero(roi_bin) / roi_bin.size
-            except:
-                pass
-        
-        roi_reports.append(f"{name}:{lit_ratio:.1%}")
-
-        # 绘图逻辑
-        status_color = (0, 255, 0) if (lit_ratio > ACTIVE_RATIO) else (0, 0, 255)
-        cv2.rectangle(canvas_result, (rx, ry), (rx+rw, ry+rh), status_color, 1)
-
-    # === 修改 1: 在控制台输出中添加参数信息 ===
-    print(f"[{img_name}] G:{gamma} L:{noise_limit} | " + " | ".join(roi_reports))
-
-    # === 修改 2: 在保存的文件名中添加参数信息 ===
+        try:
+            _, roi_bin = cv2.threshold(roi_local, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            lit_ratio = cv2.countNonZero(roi_bin) / roi_bin.size
+        except:
+            pass
+        roi_stats.append((name, (rx, ry, rw, rh), max_val, lit_ratio))
+    return roi_stats
+
+def process_single_case(img_name, panel_gray, gamma):
+    """处理一张已解码的灰度面板在某个 gamma 下的所有 noise_limit 组合，返回报告行"""
+    reports = []
+
+    # 1. Gamma 增强 + 各 ROI 统计 (与 noise_limit 无关，只算一次)
+    panel_enhanced = enhance_image(panel_gray, gamma)
+    canvas_template = cv2.cvtColor(panel_enhanced, cv2.COLOR_GRAY2BGR)
+    roi_stats = measure_rois(panel_enhanced)
     clean_name = os.path.splitext(img_name)[0]
-    save_filename = f"{clean_name}_G{gamma}_L{noise_limit}_debug.jpg"
-    cv2.imwrite(os.path.join(OUTPUT_DIR, save_filename), canvas_result)
 
+    # 2. noise_limit 只决定 ROI 是否被当作背景噪声，不需要重新计算像素
+    for noise_limit in NOISE_LIMIT_LIST:
+        canvas_result = canvas_template.copy()
+        # 用于汇总当前图片的各区域结果
+        roi_reports = []
+
+        for name, (rx, ry, rw, rh), max_val, otsu_ratio in roi_stats:
+            # 注意：这里必须使用 noise_limit 过滤背景噪声
+            lit_ratio = otsu_ratio if max_val >= noise_limit else 0.0
+            roi_reports.append(f"{name}:{lit_ratio:.1%}")
+
+            # 绘图逻辑
+            status_color = (0, 255, 0) if (lit_ratio > ACTIVE_RATIO) else (0, 0, 255)
+            cv2.rectangle(canvas_result, (rx, ry), (rx+rw, ry+rh), status_color, 1)
+
+        # === 修改 1: 在控制台输出中添加参数信息 ===
+        reports.append(f"[{img_name}] G:{gamma} L:{noise_limit} | " + " | ".join(roi_reports))
+
+        # === 修改 2: 在保存的文件名中添加参数信息 ===
+        save_filename = f"{clean_name}_G{gamma}_L{noise_limit}_debug.jpg"
+        cv2.imwrite(os.path.join(OUTPUT_DIR, save_filename), canvas_result)
+
+    return reports
+
+def process_image_job(job):
+    """进程池任务: 一张图片的全部参数组合 (灰度面板每张只传给子进程一次)"""
+    img_name, panel_gray = job
+    reports = []
+    for gamma in GAMMA_LIST:
+        reports.extend(process_single_case(img_name, panel_gray, gamma))
+    return reports
+
+def init_worker():
+    # 已按图片多进程并行，关闭 OpenCV 内部线程避免超额订阅
+    cv2.setNumThreads(1)
     
 def main():
     print(f"开始处理已裁剪图片，输出至: {OUTPUT_DIR}")
@@ -133,12 +174,14 @@ def main():
         print("未找到图片，请检查 LOCAL_DIR 路径或 URL")
         return
 
-    count = 0
-    for img_name, img_bytes in images:
-        for gamma in GAMMA_LIST:
-            for limit in NOISE_LIMIT_LIST:
-                process_single_case(img_name, img_bytes, gamma, limit)
-                count += 1
+    # 各参数组合互相独立 (输出文件名不同)，按图片分发到多个进程
+    with mp.Pool(os.cpu_count(), initializer=init_worker) as pool:
+        for reports in pool.imap_unordered(process_image_job, images):
+            # 子进程只返回报告行，由主进程统一打印，同一图片的结果不会被打散
+            for line in reports:
+                print(line)
+
+    count = len(images) * len(GAMMA_LIST) * len(NOISE_LIMIT_LIST)
     
     print(f"\n完成！共处理 {count} 组参数组合。")
 
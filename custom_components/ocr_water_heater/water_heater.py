@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import logging
 import asyncio
+import aiohttp
 import time
 from typing import Any
 from datetime import timedelta
@@ -38,7 +39,8 @@ from .const import (
     DEFAULT_UPDATE_INTERVAL,
     VALID_MIN, VALID_MAX,
     MODE_LOW_POWER, MODE_HALF, MODE_FULL, MODE_STANDBY, MODE_SETTING,
-    SCREEN_KEEP_ALIVE_INTERVAL, TARGET_TEMP_SYNC_INTERVAL
+    SCREEN_KEEP_ALIVE_INTERVAL, TARGET_TEMP_SYNC_INTERVAL,
+    FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT, FETCH_TOTAL_TIMEOUT
 )
 
 from .controller import WaterHeaterController
@@ -52,6 +54,11 @@ SYNC_WAIT_TIME = 2.5
 SETTING_BRIDGE_TIME = 8.0
 BOOT_GRACE_PERIOD = 10.0
 
+# 抓图超时 (复用同一个对象，避免每次刷新重新构造)
+FETCH_TIMEOUT = aiohttp.ClientTimeout(
+    total=FETCH_TOTAL_TIMEOUT, connect=FETCH_CONNECT_TIMEOUT, sock_read=FETCH_READ_TIMEOUT
+)
+
 # 仅包含有效运行模式的列表 (OCR 识别到的原始中文)
 VALID_RUNNING_MODES = [MODE_LOW_POWER, MODE_HALF, MODE_FULL]
 # 排序列表 (用于计算按键次数)
@@ -79,6 +86,7 @@ HA_TO_INTERNAL = {
 }
 
 def _save_debug_job(result_str, images):
+    """在 executor 中执行: debug_storage 依赖 PIL，延迟到这里导入，不在事件循环中加载"""
     from .debug_storage import save_debug_record
     save_debug_record(result_str, images)
 
@@ -116,6 +124,10 @@ class OCRCoordinator(DataUpdateCoordinator[dict[str, Any] | None]):
         self._off_count = 0
         self._last_setting_active_time = 0.0
 
+        # 上一帧图片的哈希及其识别结果 (画面未变化时跳过 OCR)
+        self._last_frame_hash = None
+        self._last_frame_result = (None, None)
+
         self.expect_on = False
         self.last_on_command_time = 0.0
         self.is_confirmed_off = True
@@ -130,21 +142,33 @@ class OCRCoordinator(DataUpdateCoordinator[dict[str, Any] | None]):
         current_time = time.time()
 
         try:
-            async with self.session.get(self.url, timeout=10) as resp:
+            async with self.session.get(self.url, timeout=FETCH_TIMEOUT) as resp:
                 if resp.status != 200: raise UpdateFailed(f"HTTP {resp.status}")
                 content = await resp.read()
         except Exception as e:
             raise UpdateFailed(f"Connection error: {e}")
 
         def _process():
-            t_val, t_imgs = self.ocr_p.process_image(content)
-            m_res, m_imgs = self.mode_p.process(content)
+            # image_utils 依赖 numpy/PIL/TurboJPEG，在 executor 中导入，不阻塞事件循环
+            from .image_utils import GrayFrame
+            # 两个处理器共享同一帧，需要整帧解码时只解一次
+            frame = GrayFrame(content)
+            t_val, t_imgs = self.ocr_p.process_image(frame)
+            m_res, m_imgs = self.mode_p.process(frame)
             return t_val, m_res, {**t_imgs, **m_imgs}
 
-        temp_res, mode_res, debug_imgs = await self.hass.async_add_executor_job(_process)
-
-        if self.debug_mode and debug_imgs:
-            await self.hass.async_add_executor_job(_save_debug_job, f"T_{temp_res}_M_{mode_res}", debug_imgs)
+        frame_hash = hash(content)
+        if frame_hash == self._last_frame_hash:
+            # 图片字节未变化，直接复用上一帧的识别结果
+            temp_res, mode_res = self._last_frame_result
+        else:
+            temp_res, mode_res, debug_imgs = await self.hass.async_add_executor_job(_process)
+            self._last_frame_hash = frame_hash
+            self._last_frame_result = (temp_res, mode_res)
+
+            if self.debug_mode and debug_imgs:
+                # 磁盘 IO 放到 executor 中，不阻塞事件循环
+                await self.hass.async_add_executor_job(_save_debug_job, f"T_{temp_res}_M_{mode_res}", debug_imgs)
 
         in_boot_grace = self.expect_on and (current_time - self.last_on_command_time < BOOT_GRACE_PERIOD)
         if in_boot_grace and (temp_res is None or mode_res is None):